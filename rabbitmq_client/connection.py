@@ -2,7 +2,7 @@ import logging
 
 from abc import ABC, abstractmethod
 
-from threading import Thread, Timer
+from threading import Lock, Thread, Timer, current_thread
 
 import pika
 from pika import SelectConnection
@@ -17,6 +17,9 @@ from rabbitmq_client.defs import DEFAULT_EXCHANGE, PublishParams
 
 LOGGER = logging.getLogger(__name__)
 
+# Used by basic_publish when no publish parameters are given, never mutated.
+DEFAULT_PUBLISH_PARAMS = PublishParams()
+
 RECONNECT_REASONS = (
     ConnectionClosedByBroker,  # Restarts/graceful shutdowns
     StreamLostError  # Ungraceful shutdown
@@ -49,7 +52,11 @@ class RMQConnection(ABC):
         self._channel = None
 
         self._reconnect_attempts = 0
+        self._reconnect_timer = None
 
+        # Guards '_closing', stop may be called concurrently from e.g. a
+        # signal handler and the connection thread.
+        self._close_lock = Lock()
         self._closing = False
         self._restarting = False
 
@@ -106,26 +113,70 @@ class RMQConnection(ABC):
         """
         LOGGER.info("restarting connection")
 
-        try:
-            self._connection.close()
-            self._restarting = True  # Only if connection could be closed.
-        except ConnectionWrongStateError:
-            LOGGER.info("connection closed and could not be restarted")
+        self.add_callback_threadsafe(self._restart_connection)
 
     def stop(self):
         """
         Starts a closing procedure for the connection and channel.
+
+        Stop may be called from any thread, including from signal handlers.
+        The connection itself is only ever closed from its ioloop thread.
         """
         LOGGER.info("stopping connection")
 
-        if not self._closing:
+        with self._close_lock:
+            if self._closing:
+                return
+
             self._closing = True
 
-            try:
-                self._connection.close()
-                self._connection_thread.join()
-            except ConnectionWrongStateError:
-                LOGGER.info("connection already closed")
+        if self._reconnect_timer is not None:
+            self._reconnect_timer.cancel()
+
+        if not self._connection_thread.is_alive():
+            # Waiting on a reconnect backoff, the connection thread has not
+            # been started and there is no running ioloop to hand over to.
+            # '_connect' will not connect once '_closing' is set.
+            self._close_connection()
+
+        elif current_thread() is self._connection_thread:
+            # Already on the ioloop thread, which cannot join itself.
+            self._close_connection()
+
+        else:
+            self.add_callback_threadsafe(self._close_connection)
+            self._connection_thread.join()
+
+    def add_callback_threadsafe(self, callback):
+        """
+        Schedules 'callback' to be run on the connection's ioloop thread. The
+        underlying pika connection is NOT thread-safe, so any channel
+        operation initiated from another thread, like a user's thread calling
+        publish or consume, must be handed over to the ioloop through here.
+
+        :param callback: callable
+        """
+        self._connection.ioloop.add_callback_threadsafe(callback)
+
+    def _restart_connection(self):
+        """
+        Closes the connection to have it re-initiated once closed. Must be run
+        on the connection's ioloop thread.
+        """
+        try:
+            self._connection.close()
+            self._restarting = True  # Only if connection could be closed.
+        except ConnectionWrongStateError:
+            LOGGER.info("connection closed and could not be restarted")
+
+    def _close_connection(self):
+        """
+        Closes the connection. Must be run on the connection's ioloop thread.
+        """
+        try:
+            self._connection.close()
+        except ConnectionWrongStateError:
+            LOGGER.info("connection already closed")
 
     def declare_queue(self,
                       queue_params,
@@ -134,7 +185,7 @@ class RMQConnection(ABC):
         :param queue_params: rabbitmq_client.QueueParams
         :param callback: callable
         """
-        LOGGER.info(f"declaring queue: {queue_params.queue}")
+        LOGGER.info("declaring queue: %s", queue_params.queue)
 
         self._channel.queue_declare(
             queue_params.queue,
@@ -152,7 +203,7 @@ class RMQConnection(ABC):
         :param exchange_params: rabbitmq_client.ExchangeParams
         :param callback: callable
         """
-        LOGGER.info(f"declaring exchange: {exchange_params.exchange}")
+        LOGGER.info("declaring exchange: %s", exchange_params.exchange)
 
         self._channel.exchange_declare(
             exchange_params.exchange,
@@ -171,9 +222,10 @@ class RMQConnection(ABC):
         :param queue_bind_params: rabbitmq_client.QueueBindParams
         :param callback: callable
         """
-        LOGGER.info(f"binding queue {queue_bind_params.queue} to exchange "
-                    f"{queue_bind_params.exchange} with routing key: "
-                    f"{queue_bind_params.routing_key}")
+        LOGGER.info("binding queue %s to exchange %s with routing key: %s",
+                    queue_bind_params.queue,
+                    queue_bind_params.exchange,
+                    queue_bind_params.routing_key)
 
         self._channel.queue_bind(
             queue_bind_params.queue,
@@ -192,8 +244,8 @@ class RMQConnection(ABC):
         :param on_message_callback_override: callable
         :param callback: callable
         """
-        LOGGER.info(f"basic consumer starting for queue: "
-                    f"{consume_params.queue}")
+        LOGGER.info("basic consumer starting for queue: %s",
+                    consume_params.queue)
 
         self._channel.basic_consume(
             consume_params.queue,
@@ -217,11 +269,11 @@ class RMQConnection(ABC):
         :param routing_key: str
         :param publish_params: rabbitmq_client.PublishParams
         """
-        LOGGER.debug(f"publishing to exchange: {exchange} and routing key: "
-                     f"{routing_key}")
+        LOGGER.debug("publishing to exchange: %s and routing key: %s",
+                     exchange, routing_key)
 
         if not publish_params:
-            publish_params = PublishParams()  # Create defaults
+            publish_params = DEFAULT_PUBLISH_PARAMS
 
         self._channel.basic_publish(exchange,
                                     routing_key,
@@ -244,10 +296,15 @@ class RMQConnection(ABC):
         Assigns a new pika.SelectConnection to the connection and starts its
         ioloop to begin connecting.
         """
+        # A reconnect backoff may fire after 'stop' was called.
+        if self._closing:
+            LOGGER.debug("skipping connect, connection stopped")
+            return
+
         if self.connection_parameters is not None:
-            LOGGER.info(f"starting connection towards: "
-                        f"{self.connection_parameters.host}:"
-                        f"{self.connection_parameters.port}")
+            LOGGER.info("starting connection towards: %s:%s",
+                        self.connection_parameters.host,
+                        self.connection_parameters.port)
         else:
             LOGGER.info("starting connection towards: 127.0.0.1:5672")
 
@@ -257,6 +314,15 @@ class RMQConnection(ABC):
             on_open_error_callback=self.on_connection_open_error,
             on_close_callback=self.on_connection_closed
         )
+
+        # 'stop' may have handed the close over to the previous connection's
+        # ioloop, which is no longer running, before the new connection was
+        # assigned. Nothing has been sent until the ioloop starts, so simply
+        # not starting it is enough.
+        if self._closing:
+            LOGGER.debug("connection stopped while connecting")
+            return
+
         self._connection.ioloop.start()
 
     def on_connection_open(self, _connection):
@@ -279,7 +345,7 @@ class RMQConnection(ABC):
         :param _connection: pika.SelectConnection
         :param error: pika.exceptions.?
         """
-        LOGGER.warning(f"error establishing connection, error: {error}")
+        LOGGER.warning("error establishing connection, error: %s", error)
 
         # This should ensure the current thread runs to completion after
         # reconnect handling is done.
@@ -305,7 +371,7 @@ class RMQConnection(ABC):
         self._connection.ioloop.stop()
 
         if not self._closing and type(reason) in RECONNECT_REASONS:
-            LOGGER.debug(f"connection closed: {reason}, attempting reconnect")
+            LOGGER.debug("connection closed: %s, attempting reconnect", reason)
             self._reconnect()
 
         elif self._restarting:
@@ -318,7 +384,7 @@ class RMQConnection(ABC):
 
         else:
             permanent = True
-            LOGGER.warning(f"connection closed: {reason}, will not reconnect")
+            LOGGER.warning("connection closed: %s, will not reconnect", reason)
 
         # Signal subclass that connection is down.
         self.on_close(permanent=permanent)
@@ -327,7 +393,7 @@ class RMQConnection(ABC):
         """
         Starts up the connection again after a gradually increasing delay.
         """
-        LOGGER.debug(f"reconnect, attempt no. {self._reconnect_attempts + 1}")
+        LOGGER.debug("reconnect, attempt no. %d", self._reconnect_attempts + 1)
 
         # Reconnect attempt may have been queued up before 'stop' was called.
         if self._closing:
@@ -341,14 +407,14 @@ class RMQConnection(ABC):
             self._connection_thread.start()
 
         else:  # calculate backoff timer
-            timer = Timer(
+            self._reconnect_timer = Timer(
                 self._reconnect_attempts if self._reconnect_attempts < 9
                 else 30,
                 self._connection_thread.start
             )
             # Timer daemon exits if program exits, to avoid eternal retries.
-            timer.daemon = True
-            timer.start()
+            self._reconnect_timer.daemon = True
+            self._reconnect_timer.start()
 
         self._reconnect_attempts += 1
 
@@ -392,6 +458,6 @@ class RMQConnection(ABC):
         self.on_close(permanent=permanent)
 
         if permanent:
-            LOGGER.critical(f"connection stopping due to permanent channel "
-                            f"closure: {reason}")
+            LOGGER.critical("connection stopping due to permanent channel "
+                            "closure: %s", reason)
             self.stop()
@@ -1,6 +1,8 @@
 import functools
 import logging
 
+from threading import Event, Lock
+
 from rabbitmq_client.defs import QueueParams, QueueBindParams, ConsumeOK
 from rabbitmq_client.connection import RMQConnection
 
@@ -82,8 +84,14 @@ class RMQConsumer(RMQConnection):
         """
         super().__init__(connection_parameters=connection_parameters)
 
-        self._ready = False
+        # Set while ready, allows waiting for readiness without polling.
+        self._ready_event = Event()
         self._consumes = dict()
+        # Guards '_consumes', which consume updates from a user's thread while
+        # the connection thread iterates it. Readiness is changed under the
+        # lock too, so that a consume is issued exactly once: either by
+        # 'consume' itself, or by 'on_ready'.
+        self._consumes_lock = Lock()
 
     @property
     def ready(self):
@@ -95,14 +103,25 @@ class RMQConsumer(RMQConnection):
 
         :return: bool
         """
-        return self._ready
+        return self._ready_event.is_set()
+
+    @property
+    def ready_event(self):
+        """
+        Set while the consumer is ready, see the 'ready' property. Wait on it
+        to block until the consumer is ready, but do NOT set or clear it.
+
+        :return: threading.Event
+        """
+        return self._ready_event
 
     def start(self):
         """
         Starts the consumer by initiating the underlying connection.
 
         NOTE! This is NOT a synchronous operation! If you must know that the
-        consumer is successfully started, monitor the 'ready' property.
+        consumer is successfully started, monitor the 'ready' property or
+        wait on 'ready_event'.
         """
         LOGGER.info("starting consumer")
 
@@ -169,26 +188,53 @@ class RMQConsumer(RMQConnection):
             exchange_params.exchange if exchange_params else "",
             routing_key
         )
-        if self._consumes.get(consume_key) is not None:
-            raise ValueError(
-                "That combination of queue + exchange + routing key already "
-                "exists."
+        with self._consumes_lock:
+            if consume_key in self._consumes:
+                raise ValueError(
+                    "That combination of queue + exchange + routing key "
+                    "already exists."
+                )
+
+            # 2. Update consumer instance
+            self._consumes[consume_key] = RMQConsume(
+                consume_params, queue_params, exchange_params, routing_key
             )
 
-        # 2. Update consumer instance
-        self._consumes[consume_key] = RMQConsume(
-            consume_params, queue_params, exchange_params, routing_key
-        )
+            ready = self.ready
 
         # 3. Start declaring shit
+        if ready:
+            self.add_callback_threadsafe(
+                functools.partial(self._handle_consume_if_ready,
+                                  consume_params,
+                                  queue_params,
+                                  exchange_params,
+                                  routing_key)
+            )
+
+        return consume_key
+
+    def _handle_consume_if_ready(self,
+                                 consume_params,
+                                 queue_params,
+                                 exchange_params,
+                                 routing_key):
+        """
+        Run on the ioloop thread. If the connection has been closed since
+        'consume' saw the consumer as ready, the next 'on_ready' re-issues the
+        consume instead.
+
+        :param consume_params: rabbitmq_client.ConsumeParams
+        :param queue_params: None | rabbitmq_client.QueueParams
+        :param exchange_params: None | rabbitmq_client.ExchangeParams
+        :param routing_key: None | str
+        """
         if self.ready:
             self._handle_consume(consume_params,
                                  queue_params,
                                  exchange_params,
                                  routing_key)
 
-        return consume_key
-
     def _handle_consume(self,
                         consume_params,
                         queue_params,
@@ -224,7 +270,7 @@ class RMQConsumer(RMQConnection):
         :param exchange_params: rabbitmq_client.ExchangeParams
         :param routing_key: str
         """
-        LOGGER.info(f"declared queue: {frame.method.queue}")
+        LOGGER.info("declared queue: %s", frame.method.queue)
 
         # Update the consume queue name to ensure it is set to the created
         # queue's name
@@ -261,7 +307,7 @@ class RMQConsumer(RMQConnection):
         :param queue_params: rabbitmq_client.QueueParams
         :param routing_key: str
         """
-        LOGGER.info(f"declared exchange: {exchange_params.exchange}")
+        LOGGER.info("declared exchange: %s", exchange_params.exchange)
 
         cb = functools.partial(self.on_queue_bound,
                                consume_params=consume_params,
@@ -287,8 +333,8 @@ class RMQConsumer(RMQConnection):
         :param exchange: str
         :param routing_key: str
         """
-        LOGGER.info(f"queue {consume_params.queue} bound to exchange "
-                    f"{exchange}")
+        LOGGER.info("queue %s bound to exchange %s",
+                    consume_params.queue, exchange)
 
         cb = functools.partial(self.on_consume_ok,
                                queue_params=queue_params,
@@ -310,7 +356,7 @@ class RMQConsumer(RMQConnection):
         :param exchange: str
         :param routing_key: str
         """
-        LOGGER.info(f"consume OK for queue: {queue_params.queue}")
+        LOGGER.info("consume OK for queue: %s", queue_params.queue)
 
         consume_instance = self._consumes[
             _gen_consume_key(queue=queue_params.queue,
@@ -323,15 +369,16 @@ class RMQConsumer(RMQConnection):
         # Enables lookup via consumer tag in 'on_msg'. These entries are
         # removed 'on_close' since the consumer tags may be refreshed on
         # reconnecting.
-        self._consumes[consume_instance.consumer_tag] = consume_instance
+        with self._consumes_lock:
+            self._consumes[consume_instance.consumer_tag] = consume_instance
 
         try:
             consume_instance.consume_params.on_message_callback(
                 ConsumeOK(consume_instance.consumer_tag)
             )
         except Exception as e:
-            LOGGER.critical(f"sending consume OK to message callback resulted "
-                            f"in an exception: {e}")
+            LOGGER.critical("sending consume OK to message callback resulted "
+                            "in an exception: %s", e)
 
     def on_msg(self, channel, basic_deliver, _basic_properties, body):
         """
@@ -346,8 +393,8 @@ class RMQConsumer(RMQConnection):
         try:
             consume_params.on_message_callback(body)
         except Exception as e:
-            LOGGER.warning(f"the on_message_callback for queue: "
-                           f"{consume_params.queue} crashed with error: {e}")
+            LOGGER.warning("the on_message_callback for queue: %s crashed "
+                           "with error: %s", consume_params.queue, e)
 
         channel.basic_ack(delivery_tag=basic_deliver.delivery_tag)
 
@@ -358,9 +405,11 @@ class RMQConsumer(RMQConnection):
         """
         LOGGER.info("consumer connection ready")
 
-        self._ready = True
+        with self._consumes_lock:
+            consumes = list(self._consumes.values())
+            self._ready_event.set()
 
-        for _key, consume in self._consumes.items():
+        for consume in consumes:
             self._handle_consume(consume.consume_params,
                                  consume.queue_params,
                                  consume.exchange_params,
@@ -382,18 +431,19 @@ class RMQConsumer(RMQConnection):
         else:
             LOGGER.info("consumer connection closed")
 
-        self._ready = False
+        with self._consumes_lock:
+            self._ready_event.clear()
 
-        old_consumer_tags = list()
-        for _key, consume in self._consumes.items():
-            # Remove all consumer tag keys in local dict since these may change
-            # on re-subscription.
-            if consume.consumer_tag is not None:
-                old_consumer_tags.append(consume.consumer_tag)
-            consume.consumer_tag = None
+            old_consumer_tags = list()
+            for consume in self._consumes.values():
+                # Remove all consumer tag keys in local dict since these may
+                # change on re-subscription.
+                if consume.consumer_tag is not None:
+                    old_consumer_tags.append(consume.consumer_tag)
+                consume.consumer_tag = None
 
-        for consumer_tag in old_consumer_tags:
-            self._consumes.pop(consumer_tag, None)
+            for consumer_tag in old_consumer_tags:
+                self._consumes.pop(consumer_tag, None)
 
     def on_error(self):
         """
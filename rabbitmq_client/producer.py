@@ -1,8 +1,11 @@
 import functools
+import itertools
 import logging
-import uuid
+import os
+import secrets
 
-from threading import Lock
+from collections import deque
+from threading import Event, Lock
 
 from pika.spec import Basic
 
@@ -15,8 +18,68 @@ from rabbitmq_client.defs import (
 
 LOGGER = logging.getLogger(__name__)
 
+# Publish keys only have to be unique within the process, a counter is far
+# cheaper than generating a UUID per publish.
+_PUBLISH_KEY_PREFIX = f"{os.getpid():x}{secrets.token_hex(3)}"
+_publish_key_counter = itertools.count()
+
+
+def _gen_publish_key():
+    """
+    :return: str
+    """
+    return f"{_PUBLISH_KEY_PREFIX}-{next(_publish_key_counter)}"
+
+
+def _cacheable_queue(queue_params):
+    """
+    A queue may only be cached by name if it stays around for the lifetime of
+    the channel. Server-named queues are new for every declaration, and
+    auto-delete queues are deleted once their last consumer goes away.
+    Exclusive queues live as long as the connection, so they may be cached.
+
+    :param queue_params: rabbitmq_client.QueueParams
+    :return: bool
+    """
+    return bool(queue_params.queue and not queue_params.auto_delete)
+
+
+def _cacheable_exchange(exchange_params):
+    """
+    Auto-delete exchanges are deleted once their last binding is removed,
+    which the producer has no way of knowing about.
+
+    :param exchange_params: rabbitmq_client.ExchangeParams
+    :return: bool
+    """
+    return not exchange_params.auto_delete
+
+
+def _publish_target(publish):
+    """
+    :param publish: RMQPublish
+    :return: tuple, identifying what 'publish' is published to
+    """
+    if publish.queue_params:
+        # Server-named queues are declared anew for every publish.
+        return "queue", publish.queue_params.queue or id(publish)
+
+    return "exchange", publish.exchange_params.exchange
+
 
 class RMQPublish:
+    """
+    A publish that has yet to be sent. One is created per call to publish, so
+    the instance dict is skipped in favor of slots.
+    """
+
+    __slots__ = ("body",
+                 "exchange_params",
+                 "routing_key",
+                 "queue_params",
+                 "publish_params",
+                 "publish_key",
+                 "declared_target")
 
     def __init__(self,
                  body,
@@ -39,6 +102,8 @@ class RMQPublish:
         self.queue_params = queue_params
         self.publish_params = publish_params
         self.publish_key = publish_key
+        # Set once the declaration of an uncached target has returned.
+        self.declared_target = None
 
 
 class RMQProducer(RMQConnection):
@@ -53,9 +118,12 @@ class RMQProducer(RMQConnection):
         """
         super().__init__(connection_parameters=connection_parameters)
 
-        self._ready = False
+        # Set while ready, allows waiting for readiness without polling.
+        self._ready_event = Event()
 
-        self._buffered_messages = list()
+        # deque since publish may append from a user's thread while the
+        # connection thread is draining the buffer.
+        self._buffered_messages = deque()
 
         self._confirm_mode_active = False
         self._confirm_delivery_callback = None
@@ -63,6 +131,19 @@ class RMQProducer(RMQConnection):
         self._publish_lock = Lock()
         self._unacked_publishes = dict()
 
+        # Declarations are channel-scoped, an exchange or queue is declared
+        # only once per channel. Targets that may go away during the
+        # channel's lifetime are not cached, see _cacheable_queue and
+        # _cacheable_exchange.
+        self._declared_exchanges = set()
+        self._declaring_exchanges = set()
+        self._declared_queues = set()
+        self._declaring_queues = set()
+        # Publishes not yet sent on the current channel, in publish order.
+        # A publish waiting for its target to be declared holds back all
+        # publishes after it, to keep the order publishes are sent in.
+        self._pending_publishes = deque()
+
     @property
     def ready(self):
         """
@@ -73,14 +154,25 @@ class RMQProducer(RMQConnection):
 
         :return: bool
         """
-        return self._ready
+        return self._ready_event.is_set()
+
+    @property
+    def ready_event(self):
+        """
+        Set while the producer is ready, see the 'ready' property. Wait on it
+        to block until the producer is ready, but do NOT set or clear it.
+
+        :return: threading.Event
+        """
+        return self._ready_event
 
     def start(self):
         """
         Starts the consumer by initiating the underlying connection.
 
         NOTE! This is NOT a synchronous operation! If you must know that the
-        consumer is successfully started, monitor the 'ready' property.
+        consumer is successfully started, monitor the 'ready' property or
+        wait on 'ready_event'.
         """
         LOGGER.info("starting producer")
 
@@ -117,6 +209,9 @@ class RMQProducer(RMQConnection):
         know declaration details since there is no intermediate step to publish
         to.
 
+        Publishes are sent in the order publish is called, a publish waiting
+        for its target to be declared holds back all publishes made after it.
+
         If confirm mode is activated, a key is returned which corresponds to
         the message being published. Users can confirm that their publish has
         been sent successfully by waiting for their key to be referred to in
@@ -144,32 +239,27 @@ class RMQProducer(RMQConnection):
 
         publish_key = None
         if self._confirm_delivery_callback is not None:
-            publish_key = str(uuid.uuid4())
-
-        if (
-                self.ready and
-                (
-                    (self._confirm_delivery_callback is not None and
-                     self._confirm_mode_active) or
-                    self._confirm_delivery_callback is None
-                )
-        ):
-            self._handle_publish(body,
-                                 exchange_params,
-                                 routing_key,
-                                 queue_params,
-                                 publish_params,
-                                 publish_key)
+            publish_key = _gen_publish_key()
+
+        publish = RMQPublish(body,
+                             exchange_params=exchange_params,
+                             routing_key=routing_key,
+                             queue_params=queue_params,
+                             publish_params=publish_params,
+                             publish_key=publish_key)
+
+        if self.ready:
+            self.add_callback_threadsafe(
+                functools.partial(self._publish_or_buffer, publish)
+            )
 
         else:
-            self._buffered_messages.append(
-                RMQPublish(body,
-                           exchange_params=exchange_params,
-                           routing_key=routing_key,
-                           queue_params=queue_params,
-                           publish_params=publish_params,
-                           publish_key=publish_key)
-            )
+            self._buffered_messages.append(publish)
+
+            # The producer may have become ready, and emptied the buffer,
+            # between the check above and the append.
+            if self.ready:
+                self.add_callback_threadsafe(self._empty_buffered_messages)
 
         return publish_key
 
@@ -179,85 +269,178 @@ class RMQProducer(RMQConnection):
         """
         if self.ready and self._confirm_delivery_callback is None:
             LOGGER.info("activating confirm delivery mode")
-            self.confirm_delivery(self.on_delivery_confirmed,
-                                  callback=self.on_confirm_select_ok)
+            self.add_callback_threadsafe(self._confirm_delivery_if_ready)
 
         self._confirm_delivery_callback = notify_callback
 
-    def _handle_publish(self,
-                        body,
-                        exchange_params,
-                        routing_key,
-                        queue_params,
-                        publish_params,
-                        publish_key):
+    def _can_publish(self):
         """
-        :param body: bytes
-        :param exchange_params: rabbitmq_client.ExchangeParams
-        :param routing_key: str
-        :param queue_params: rabbitmq_client.QueueParams
-        :param publish_params: rabbitmq_client.PublishParams
-        :param publish_key: str
+        Publishes may only be sent when the producer is ready and, if confirm
+        mode has been requested, once the broker has confirmed it is active.
+
+        :returns: bool
+        """
+        return self.ready and (self._confirm_delivery_callback is None or
+                               self._confirm_mode_active)
+
+    def _publish_or_buffer(self, publish):
+        """
+        Run on the ioloop thread. The connection may have been closed since
+        'publish' saw the producer as ready, in which case the publish is
+        buffered to be sent by the next 'on_ready'.
+
+        :param publish: RMQPublish
+        """
+        if self._can_publish():
+            self._handle_publish([publish])
+
+        else:
+            self._buffered_messages.append(publish)
+
+    def _confirm_delivery_if_ready(self):
+        """
+        Run on the ioloop thread. If the connection has been closed since
+        'activate_confirm_mode' saw the producer as ready, the next 'on_ready'
+        activates confirm mode instead.
+        """
+        if self.ready:
+            self.confirm_delivery(self.on_delivery_confirmed,
+                                  callback=self.on_confirm_select_ok)
+
+    def _handle_publish(self, publishes):
         """
+        Declares the publish target shared by 'publishes', unless already
+        declared or being declared on the current channel, and queues the
+        publishes to be sent in publish order.
+
+        :param publishes: [RMQPublish], all with the same exchange or queue
+        """
+        queue_params = publishes[0].queue_params
+
         if queue_params:
+            queue = queue_params.queue
+
+            if not _cacheable_queue(queue_params):
+                # Declared for every publish, and not shared with other
+                # pending publishes.
+                cb = functools.partial(self.on_queue_declared,
+                                       queue_params,
+                                       publishes=publishes)
 
-            cb = functools.partial(self.on_queue_declared,
-                                   body,
-                                   publish_params=publish_params,
-                                   publish_key=publish_key)
+                self.declare_queue(queue_params, callback=cb)
 
-            self.declare_queue(queue_params, callback=cb)
+            elif (queue not in self._declared_queues and
+                  queue not in self._declaring_queues):
+                self._declaring_queues.add(queue)
+
+                cb = functools.partial(self.on_queue_declared, queue_params)
+
+                self.declare_queue(queue_params, callback=cb)
 
         else:
-            cb = functools.partial(self.on_exchange_declared,
-                                   body,
-                                   exchange_params,
-                                   routing_key=routing_key,
-                                   publish_params=publish_params,
-                                   publish_key=publish_key)
+            exchange_params = publishes[0].exchange_params
+            exchange = exchange_params.exchange
 
-            self.declare_exchange(exchange_params, callback=cb)
+            if not _cacheable_exchange(exchange_params):
+                cb = functools.partial(self.on_exchange_declared,
+                                       exchange_params,
+                                       publishes=publishes)
 
-    def on_queue_declared(self,
-                          body,
-                          frame,
-                          publish_params=None,
-                          publish_key=None):
+                self.declare_exchange(exchange_params, callback=cb)
+
+            elif (exchange not in self._declared_exchanges and
+                  exchange not in self._declaring_exchanges):
+                self._declaring_exchanges.add(exchange)
+
+                cb = functools.partial(self.on_exchange_declared,
+                                       exchange_params)
+
+                self.declare_exchange(exchange_params, callback=cb)
+
+        self._pending_publishes.extend(publishes)
+        self._send_pending_publishes()
+
+    def on_queue_declared(self, queue_params, frame, publishes=None):
         """
-        :param body: bytes
+        :param queue_params: rabbitmq_client.QueueParams
         :param frame: pika.frame.Method
-        :param publish_params: rabbitmq_client.PublishParams
-        :param publish_key: str
+        :param publishes: None | [RMQPublish], set for uncached queues
         """
-        LOGGER.info(f"declared queue: {frame.method.queue}")
+        LOGGER.info("declared queue: %s", frame.method.queue)
+
+        if publishes is None:
+            self._declaring_queues.discard(queue_params.queue)
+            self._declared_queues.add(queue_params.queue)
+
+        else:
+            for publish in publishes:
+                publish.declared_target = frame.method.queue
 
-        self._finalize_publish(body,
-                               routing_key=frame.method.queue,
-                               publish_params=publish_params,
-                               publish_key=publish_key)
+        self._send_pending_publishes()
 
-    def on_exchange_declared(self,
-                             body,
-                             exchange_params,
-                             _frame,
-                             routing_key="",
-                             publish_params=None,
-                             publish_key=None):
+    def on_exchange_declared(self, exchange_params, _frame, publishes=None):
         """
-        :param body: bytes
         :param exchange_params: rabbitmq_client.ExchangeParams
         :param _frame: pika.frame.Method
-        :param routing_key: str
-        :param publish_params: rabbitmq_client.PublishParams
-        :param publish_key: str
+        :param publishes: None | [RMQPublish], set for uncached exchanges
         """
-        LOGGER.info(f"declared exchange: {exchange_params.exchange}")
+        exchange = exchange_params.exchange
 
-        self._finalize_publish(body,
-                               exchange=exchange_params.exchange,
-                               routing_key=routing_key,
-                               publish_params=publish_params,
-                               publish_key=publish_key)
+        LOGGER.info("declared exchange: %s", exchange)
+
+        if publishes is None:
+            self._declaring_exchanges.discard(exchange)
+            self._declared_exchanges.add(exchange)
+
+        else:
+            for publish in publishes:
+                publish.declared_target = exchange
+
+        self._send_pending_publishes()
+
+    def _declared_target(self, publish):
+        """
+        :param publish: RMQPublish
+        :returns: None | str, the declared exchange or queue to publish to,
+                  None if its declaration is still in flight
+        """
+        if publish.declared_target is not None:
+            return publish.declared_target
+
+        if publish.queue_params:
+            queue = publish.queue_params.queue
+            return queue if queue in self._declared_queues else None
+
+        exchange = publish.exchange_params.exchange
+        return exchange if exchange in self._declared_exchanges else None
+
+    def _send_pending_publishes(self):
+        """
+        Sends pending publishes in publish order, up to the first one whose
+        target is still being declared. Publishes after it wait even if their
+        own target has been declared, or they would overtake it.
+        """
+        while self._pending_publishes:
+            publish = self._pending_publishes[0]
+
+            target = self._declared_target(publish)
+            if target is None:
+                return
+
+            self._pending_publishes.popleft()
+
+            if publish.queue_params:
+                self._finalize_publish(publish.body,
+                                       routing_key=target,
+                                       publish_params=publish.publish_params,
+                                       publish_key=publish.publish_key)
+
+            else:
+                self._finalize_publish(publish.body,
+                                       exchange=target,
+                                       routing_key=publish.routing_key,
+                                       publish_params=publish.publish_params,
+                                       publish_key=publish.publish_key)
 
     def _finalize_publish(self,
                           body,
@@ -291,17 +474,21 @@ class RMQProducer(RMQConnection):
 
     def _empty_buffered_messages(self):
         """
-        Sends all buffered messages.
+        Sends all buffered messages in the order they were buffered.
+        Consecutive messages sharing a publish target are handled as one
+        batch, so that the target is only declared once for the run.
+        Messages are left buffered if the producer cannot publish yet.
         """
-        for buffered_message in self._buffered_messages:
-            self._handle_publish(buffered_message.body,
-                                 buffered_message.exchange_params,
-                                 buffered_message.routing_key,
-                                 buffered_message.queue_params,
-                                 buffered_message.publish_params,
-                                 buffered_message.publish_key)
+        if not self._can_publish():
+            return
 
-        self._buffered_messages = list()
+        buffered_messages = list()
+        while self._buffered_messages:
+            buffered_messages.append(self._buffered_messages.popleft())
+
+        for _target, publishes in itertools.groupby(buffered_messages,
+                                                    key=_publish_target):
+            self._handle_publish(list(publishes))
 
     def on_confirm_select_ok(self, _frame):
         """
@@ -317,18 +504,36 @@ class RMQProducer(RMQConnection):
         """
         :param frame: pika.frame.Method
         """
-        publish_key = self._unacked_publishes.pop(
-            frame.method.delivery_tag
-        )
-
-        if isinstance(frame.method, Basic.Ack):
-            self._confirm_delivery_callback(publish_key)
+        delivery_tag = frame.method.delivery_tag
 
+        if frame.method.multiple:
+            # The broker confirms all outstanding delivery tags up to and
+            # including 'delivery_tag'. Tags are added to the unacked dict in
+            # increasing order, so they can be collected from its start.
+            delivery_tags = list(itertools.takewhile(
+                lambda tag: tag <= delivery_tag, self._unacked_publishes
+            ))
         else:
-            LOGGER.error(f"broker nacked a publish: {frame}")
-            self._confirm_delivery_callback(
-                DeliveryError(publish_key)
-            )
+            delivery_tags = [delivery_tag]
+
+        acked = isinstance(frame.method, Basic.Ack)
+        if not acked:
+            LOGGER.error("broker nacked a publish: %s", frame)
+
+        for tag in delivery_tags:
+            publish_key = self._unacked_publishes.pop(tag, None)
+            if publish_key is None:
+                LOGGER.warning("got confirm for unknown delivery tag: %d",
+                               tag)
+                continue
+
+            if acked:
+                self._confirm_delivery_callback(publish_key)
+
+            else:
+                self._confirm_delivery_callback(
+                    DeliveryError(publish_key)
+                )
 
     def on_ready(self):
         """
@@ -337,7 +542,7 @@ class RMQProducer(RMQConnection):
         """
         LOGGER.info("producer connection ready")
 
-        self._ready = True
+        self._ready_event.set()
 
         if self._confirm_delivery_callback is not None:
             self.confirm_delivery(self.on_delivery_confirmed,
@@ -362,11 +567,28 @@ class RMQProducer(RMQConnection):
         else:
             LOGGER.info("producer connection closed")
 
-        self._ready = False
+        self._ready_event.clear()
         self._confirm_mode_active = False
         # Delivery tags are channel-specific, so connection going down means
-        # the tag is reset.
+        # the tag is reset. Publishes still awaiting confirmation will never
+        # be confirmed on the new channel, and would otherwise collide with
+        # its delivery tags, so they are reported as failed.
+        for publish_key in self._unacked_publishes.values():
+            self._confirm_delivery_callback(DeliveryError(publish_key))
         self._next_delivery_tag = 1
+        self._unacked_publishes = dict()
+
+        # Pending publishes were never sent, put them back at the front of
+        # the buffer to be sent by the next 'on_ready'.
+        for publish in self._pending_publishes:
+            publish.declared_target = None
+        self._buffered_messages.extendleft(reversed(self._pending_publishes))
+
+        self._declared_exchanges = set()
+        self._declaring_exchanges = set()
+        self._declared_queues = set()
+        self._declaring_queues = set()
+        self._pending_publishes = deque()
 
     def on_error(self):
         """
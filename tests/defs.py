@@ -17,3 +17,21 @@ class NotAThread:
 
     def join(self):
         pass
+
+
+class NotAnIOLoop:
+    """
+    Used to keep unittests single-threaded. Runs callbacks handed to
+    add_callback_threadsafe immediately instead of on an ioloop thread.
+    """
+    def __init__(self):
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def add_callback_threadsafe(self, callback):
+        callback()
@@ -1,3 +1,4 @@
+import threading
 import unittest
 
 from unittest.mock import Mock, patch
@@ -16,7 +17,7 @@ from rabbitmq_client import (
     DEFAULT_EXCHANGE,
     PublishParams
 )
-from tests.defs import NotAThread
+from tests.defs import NotAThread, NotAnIOLoop
 
 
 class ConnectionImplementer(RMQConnection):
@@ -150,6 +151,7 @@ class TestConnectionBase(unittest.TestCase):
         self.conn_imp.on_close = Mock()
         self.conn_imp._reconnect = Mock()
         self.conn_imp.start()
+        self.conn_imp._connection = Mock(ioloop=NotAnIOLoop())
         self.conn_imp.on_connection_open(None)
         self.conn_imp.on_channel_open(Mock())
 
@@ -161,7 +163,7 @@ class TestConnectionBase(unittest.TestCase):
         self.assertTrue(self.conn_imp._closing)
         self.conn_imp._connection.close.assert_called()
         self.conn_imp.on_close.assert_called()
-        self.conn_imp._connection.ioloop.stop.assert_called()
+        self.assertFalse(self.conn_imp._connection.ioloop.running)
         self.conn_imp._reconnect.assert_not_called()
 
     def test_stop_connection_already_stopped(self):
@@ -169,16 +171,108 @@ class TestConnectionBase(unittest.TestCase):
         Verify connection stop when already stopped.
         """
         # Setup
+        self.conn_imp._connection = Mock(ioloop=NotAnIOLoop())
+        self.conn_imp._connection.close.side_effect = (
+            ConnectionWrongStateError
+        )
+
+        # Run test
+        self.conn_imp.stop()
+
+        # Assertions
+        self.assertTrue(self.conn_imp._closing)
+
+    def test_stop_connection_twice(self):
+        """
+        Verify that only the first call to stop closes the connection.
+        """
+        # Setup
+        self.conn_imp._connection = Mock(ioloop=NotAnIOLoop())
+
+        # Run test
+        self.conn_imp.stop()
+        self.conn_imp.stop()
+
+        # Assertions
+        self.assertTrue(self.conn_imp._closing)
+        self.conn_imp._connection.close.assert_called_once()
+
+    def test_stop_connection_from_connection_thread(self):
+        """
+        Verify that stop called from the connection thread, for example on a
+        permanent channel closure, closes the connection right away without
+        joining the connection thread.
+        """
+        # Setup
+        self.conn_imp._connection = Mock()
+        self.conn_imp._connection_thread = threading.current_thread()
+
+        # Run test
+        self.conn_imp.stop()
+
+        # Assertions
+        self.conn_imp._connection.close.assert_called_once()
+        self.conn_imp._connection.ioloop.add_callback_threadsafe \
+            .assert_not_called()
+
+    @patch("rabbitmq_client.connection.SelectConnection")
+    @patch("rabbitmq_client.connection.Timer")
+    @patch("rabbitmq_client.connection.Thread", new=NotAThread)
+    def test_stop_connection_during_reconnect_backoff(self,
+                                                      timer,
+                                                      select_connection):
+        """
+        Verify that stop called while waiting on a reconnect backoff cancels
+        the backoff, and that no new connection is made should the backoff
+        fire anyway.
+        """
+        # Setup
         self.conn_imp._connection = Mock()
         self.conn_imp._connection.close.side_effect = (
             ConnectionWrongStateError
         )
+        self.conn_imp._reconnect_attempts = 1
+        self.conn_imp._reconnect()
+        fire_backoff = timer.call_args[0][1]
 
         # Run test
         self.conn_imp.stop()
+        fire_backoff()
 
         # Assertions
         self.assertTrue(self.conn_imp._closing)
+        timer.return_value.cancel.assert_called()
+        select_connection.assert_not_called()
+
+    @patch("rabbitmq_client.connection.SelectConnection")
+    @patch("rabbitmq_client.connection.Thread", new=NotAThread)
+    def test_stop_connection_during_restart(self, select_connection):
+        """
+        Verify that stop called after a restart has started a new connection
+        thread, but before the new connection has been assigned, does not
+        leave the new connection running.
+        """
+        # Setup
+        self.conn_imp.on_close = Mock()
+        self.conn_imp._connection = Mock(ioloop=NotAnIOLoop())
+        new_connection = Mock()
+
+        def stop_while_connecting(**_kwargs):
+            # The close is handed to the old, stopped, ioloop.
+            self.conn_imp._connection.ioloop.add_callback_threadsafe = Mock()
+            self.conn_imp.stop()
+            return new_connection
+
+        select_connection.side_effect = stop_while_connecting
+
+        # Run test
+        self.conn_imp.restart()
+        self.conn_imp.on_connection_closed(None, None)
+
+        # Assertions
+        self.assertTrue(self.conn_imp._closing)
+        self.assertIs(self.conn_imp._connection, new_connection)
+        new_connection.ioloop.start.assert_not_called()
 
     @patch("rabbitmq_client.connection.SelectConnection")
     @patch("rabbitmq_client.connection.Thread", new=NotAThread)
@@ -189,7 +283,7 @@ class TestConnectionBase(unittest.TestCase):
         # Setup
         self.conn_imp.on_close = Mock()
         self.conn_imp.on_ready = Mock()
-        self.conn_imp._connection = Mock()
+        self.conn_imp._connection = Mock(ioloop=NotAnIOLoop())
 
         # Run test
 
@@ -203,7 +297,7 @@ class TestConnectionBase(unittest.TestCase):
         previous_connection = self.conn_imp._connection
         self.conn_imp.on_connection_closed(None, None)
         self.conn_imp.on_close.assert_called()
-        previous_connection.ioloop.stop.assert_called()
+        self.assertFalse(previous_connection.ioloop.running)
         self.assertFalse(self.conn_imp._restarting)
         self.conn_imp._connection.ioloop.start.assert_called()
 
@@ -322,7 +416,7 @@ class TestConnectionBase(unittest.TestCase):
         Verify restarting a closed connection.
         """
         # Setup
-        self.conn_imp._connection = Mock()
+        self.conn_imp._connection = Mock(ioloop=NotAnIOLoop())
         self.conn_imp._connection.close.side_effect = (
             ConnectionWrongStateError()
         )
@@ -355,6 +449,22 @@ class TestConnectionDeclarations(unittest.TestCase):
         self.channel_mock = Mock()
         self.conn_imp.on_channel_open(self.channel_mock)
 
+    def test_add_callback_threadsafe(self):
+        """
+        Verify callbacks are handed over to the connection's ioloop rather
+        than being run by the calling thread.
+        """
+        # Prep
+        callback = Mock()
+
+        # Test
+        self.conn_imp.add_callback_threadsafe(callback)
+
+        # Assert
+        self.conn_imp._connection.ioloop.add_callback_threadsafe \
+            .assert_called_with(callback)
+        callback.assert_not_called()
+
     def test_declare_queue(self):
         """
         Verify declaring a queue.
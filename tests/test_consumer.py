@@ -10,6 +10,7 @@ from rabbitmq_client import (
     RMQConsumer
 )
 from rabbitmq_client.consumer import _gen_consume_key
+from tests.defs import NotAnIOLoop
 
 
 class TestConsumeKeyGeneration(unittest.TestCase):
@@ -72,6 +73,8 @@ class TestConsumer(unittest.TestCase):
         """Setup to run before each test case."""
         self.consumer = RMQConsumer()
         self.consumer.start()
+        # Make work handed to the ioloop run immediately.
+        self.consumer._connection = Mock(ioloop=NotAnIOLoop())
         self.consumer.on_ready()  # Fake connection getting ready
 
         self.consumer.declare_queue = Mock()
@@ -82,8 +85,10 @@ class TestConsumer(unittest.TestCase):
     def test_consumer_readiness(self):
         """Verify the consumer's ready property changes as expected."""
         self.assertTrue(self.consumer.ready)
+        self.assertTrue(self.consumer.ready_event.is_set())
         self.consumer.on_close()
         self.assertFalse(self.consumer.ready)
+        self.assertFalse(self.consumer.ready_event.is_set())
         self.consumer.on_ready()
         self.assertTrue(self.consumer.ready)
         self.consumer.on_close(permanent=True)
@@ -137,6 +142,79 @@ class TestConsumer(unittest.TestCase):
         self.assertEqual(consume_instance.exchange_params, None)
         self.consumer.declare_queue.assert_called_with(queue, callback=ANY)
 
+    def test_consume_is_handed_over_to_ioloop(self):
+        """
+        Verify that consume does not touch the channel from the calling
+        thread, but leaves the declarations to the connection's ioloop.
+        """
+        # Prep
+        def on_msg(): pass
+        self.consumer._connection = Mock()
+        queue = QueueParams("queue")
+
+        # Run test
+        self.consumer.consume(ConsumeParams(on_msg), queue_params=queue)
+
+        # Assertions
+        self.consumer.declare_queue.assert_not_called()
+        callback = (self.consumer._connection.ioloop.add_callback_threadsafe
+                    .call_args[0][0])
+        callback()
+        self.consumer.declare_queue.assert_called_with(queue, callback=ANY)
+
+    def test_consume_not_issued_if_closed_before_handed_over(self):
+        """
+        Verify that a consume handed over to the ioloop is left to the next
+        'on_ready' if the connection closes before the ioloop runs it.
+        """
+        # Prep
+        def on_msg(): pass
+        self.consumer._connection = Mock()
+        queue = QueueParams("queue")
+
+        # Run test
+        self.consumer.consume(ConsumeParams(on_msg), queue_params=queue)
+        callback = (self.consumer._connection.ioloop.add_callback_threadsafe
+                    .call_args[0][0])
+        self.consumer.on_close()
+        callback()
+
+        # Assertions
+        self.consumer.declare_queue.assert_not_called()
+
+        self.consumer.on_ready()
+        self.consumer.declare_queue.assert_called_once_with(queue,
+                                                            callback=ANY)
+
+    def test_consume_during_on_ready_issued_once(self):
+        """
+        Verify that a consume made while 'on_ready' is re-issuing consumes is
+        issued exactly once, and does not disturb the re-issuing.
+        """
+        # Prep
+        def on_msg(): pass
+        queue_1 = QueueParams("queue1")
+        queue_2 = QueueParams("queue2")
+        self.consumer.on_close()
+        self.consumer.consume(ConsumeParams(on_msg), queue_params=queue_1)
+
+        def consume_during_on_ready(queue_params, callback=None):
+            if queue_params is queue_1:
+                self.consumer.consume(ConsumeParams(on_msg),
+                                      queue_params=queue_2)
+
+        self.consumer.declare_queue.side_effect = consume_during_on_ready
+
+        # Run test
+        self.consumer.on_ready()
+
+        # Assertions
+        self.assertEqual(
+            [queue_1, queue_2],
+            [declare[0][0]
+             for declare in self.consumer.declare_queue.call_args_list]
+        )
+
     def test_consume_both_queue_and_exchange(self):
         """
         Verify possibility to provide both an exchange and a queue to the
@@ -1,10 +1,6 @@
 import threading
-
-import time
 import unittest
 
-from datetime import datetime
-
 from pika.exchange_type import ExchangeType
 
 from rabbitmq_client import (
@@ -18,70 +14,81 @@ from rabbitmq_client import (
 
 
 def started(rmq_client, timeout=2.0):
-    start_time = datetime.now()
-    while not rmq_client.ready:
-        elapsed_time = datetime.now() - start_time
-        if elapsed_time.total_seconds() >= timeout:
-            return False
-
-        time.sleep(0.05)  # Wanne go fast
-
-    return True
+    return rmq_client.ready_event.wait(timeout=timeout)
 
 
 # noinspection DuplicatedCode
 class IntegrationTest(unittest.TestCase):
+    # Neither the consumer nor the producer modifies these, they can be
+    # shared between test cases.
+    EXCHANGE = ExchangeParams("exchange")
+    EX_DIRECT = ExchangeParams("exchange_direct")
+    EX_FANOUT = ExchangeParams("exchange_fanout",
+                               exchange_type=ExchangeType.fanout)
+    QUEUE = QueueParams("queue")
 
-    def setUp(self) -> None:
-        self.consumer = RMQConsumer()
-        self.consumer.start()
-        self.assertTrue(started(self.consumer))
-
-        self.producer = RMQProducer()
-        self.producer.start()
-        self.assertTrue(started(self.producer))
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        One consumer and producer are shared by all test cases to avoid
+        paying for connection establishment per test case. Test cases that
+        stop a client or change its mode use their own instances.
+        """
+        cls.consumer = RMQConsumer()
+        cls.consumer.start()
+        assert started(cls.consumer)
 
-    def tearDown(self) -> None:
-        self.consumer.stop()
-        self.producer.stop()
+        cls.producer = RMQProducer()
+        cls.producer.start()
+        assert started(cls.producer)
 
     def test_stop_consumer(self):
         """
         Verify RMQConsumer, when stopped, shuts down completely and releases
         allocated resources.
         """
+        # Prep
+        thread_count = len(threading.enumerate())
+        consumer = RMQConsumer()
+        consumer.start()
+        self.assertTrue(started(consumer))
+
         # Run test
-        self.consumer.stop()
+        consumer.stop()
 
-        thread_count = len(threading.enumerate())
-        # Only MainThread should still be running.
-        self.assertEqual(2, thread_count)
+        # Only the threads from before the consumer started should remain.
+        self.assertFalse(consumer._connection_thread.is_alive())
+        self.assertEqual(thread_count, len(threading.enumerate()))
 
     def test_consume_from_queue(self):
         """Verify RMQConsumer can consume from a queue."""
         msg_received = None
-        event = threading.Event()
+        consume_ok = threading.Event()
+        msg_event = threading.Event()
 
         def on_msg(msg):
-            event.set()
-
             nonlocal msg_received
-            msg_received = msg
+
+            if isinstance(msg, ConsumeOK):
+                consume_ok.set()
+            else:
+                msg_received = msg
+                msg_event.set()
 
         # Consume
         consume_key = self.consumer.consume(ConsumeParams(on_msg),
-                                            queue_params=QueueParams("queue"))
+                                            queue_params=self.QUEUE)
         self.assertEqual(consume_key, "queue")
 
         # Wait for ConsumeOK
-        event.wait(timeout=1.0)
-        self.assertTrue(isinstance(msg_received, ConsumeOK))
+        self.assertTrue(consume_ok.wait(timeout=1.0),
+                        "timed out waiting for ConsumeOK")
 
         # Send a message and verify it is delivered OK
-        event.clear()  # clear to re-use event
-        self.producer.publish(b"body", queue_params=QueueParams("queue"))
+        self.producer.publish(b"body", queue_params=self.QUEUE)
 
-        event.wait(timeout=1.0)
+        self.assertTrue(msg_event.wait(timeout=1.0),
+                        "timed out waiting for message")
         self.assertEqual(msg_received, b"body")
 
     def test_consume_from_direct_exchange(self):
@@ -89,33 +96,37 @@ class IntegrationTest(unittest.TestCase):
         Verify RMQConsumer can consume from a direct exchange and routing key.
         """
         msg_received = None
-        event = threading.Event()
+        consume_ok = threading.Event()
+        msg_event = threading.Event()
 
         def on_msg(msg):
-            event.set()
-
             nonlocal msg_received
-            msg_received = msg
+
+            if isinstance(msg, ConsumeOK):
+                consume_ok.set()
+            else:
+                msg_received = msg
+                msg_event.set()
 
         # Consume
         consume_key = self.consumer.consume(
             ConsumeParams(on_msg),
-            exchange_params=ExchangeParams("exchange"),
+            exchange_params=self.EXCHANGE,
             routing_key="bla.bla"
         )
         self.assertEqual(consume_key, "exchange|bla.bla")
 
         # Wait for ConsumeOK
-        event.wait(timeout=1.0)
-        self.assertTrue(isinstance(msg_received, ConsumeOK))
+        self.assertTrue(consume_ok.wait(timeout=1.0),
+                        "timed out waiting for ConsumeOK")
 
         # Send a message and verify it is delivered OK
-        event.clear()
         self.producer.publish(b"body",
-                              exchange_params=ExchangeParams("exchange"),
+                              exchange_params=self.EXCHANGE,
                               routing_key="bla.bla")
 
-        event.wait(timeout=1.0)
+        self.assertTrue(msg_event.wait(timeout=1.0),
+                        "timed out waiting for message")
         self.assertEqual(msg_received, b"body")
 
     def test_consume_from_fanout_exchange(self):
@@ -123,34 +134,34 @@ class IntegrationTest(unittest.TestCase):
         Verify RMQConsumer can consume from a fanout exchange.
         """
         msg_received = None
-        event = threading.Event()
+        consume_ok = threading.Event()
+        msg_event = threading.Event()
 
         def on_msg(msg):
-            event.set()
-
             nonlocal msg_received
-            msg_received = msg
+
+            if isinstance(msg, ConsumeOK):
+                consume_ok.set()
+            else:
+                msg_received = msg
+                msg_event.set()
 
         # Consume
         consume_key = self.consumer.consume(
             ConsumeParams(on_msg),
-            exchange_params=ExchangeParams("exchange_fanout",
-                                           exchange_type=ExchangeType.fanout)
+            exchange_params=self.EX_FANOUT
         )
         self.assertEqual(consume_key, "exchange_fanout")
 
         # Wait for ConsumeOK
-        event.wait(timeout=1.0)
-        self.assertTrue(isinstance(msg_received, ConsumeOK))
+        self.assertTrue(consume_ok.wait(timeout=1.0),
+                        "timed out waiting for ConsumeOK")
 
         # Send a message and verify it is delivered OK
-        event.clear()
-        self.producer.publish(
-            b"body",
-            exchange_params=ExchangeParams("exchange_fanout",
-                                           exchange_type=ExchangeType.fanout))
+        self.producer.publish(b"body", exchange_params=self.EX_FANOUT)
 
-        event.wait(timeout=1.0)
+        self.assertTrue(msg_event.wait(timeout=1.0),
+                        "timed out waiting for message")
         self.assertEqual(msg_received, b"body")
 
     def test_consume_from_exchange_and_queue(self):
@@ -159,35 +170,35 @@ class IntegrationTest(unittest.TestCase):
         specific queue.
         """
         msg_received = None
-        event = threading.Event()
+        consume_ok = threading.Event()
+        msg_event = threading.Event()
 
         def on_msg(msg):
-            event.set()
-
             nonlocal msg_received
-            msg_received = msg
+
+            if isinstance(msg, ConsumeOK):
+                consume_ok.set()
+            else:
+                msg_received = msg
+                msg_event.set()
 
         # Consume
         consume_key = self.consumer.consume(
             ConsumeParams(on_msg),
-            exchange_params=ExchangeParams("exchange_fanout",
-                                           exchange_type=ExchangeType.fanout),
+            exchange_params=self.EX_FANOUT,
             queue_params=QueueParams("queue_fanout_receiver")
         )
         self.assertEqual(consume_key, "queue_fanout_receiver|exchange_fanout")
 
         # Wait for ConsumeOK
-        event.wait(timeout=1.0)
-        self.assertTrue(isinstance(msg_received, ConsumeOK))
+        self.assertTrue(consume_ok.wait(timeout=1.0),
+                        "timed out waiting for ConsumeOK")
 
         # Send a message and verify it is delivered OK
-        event.clear()
-        self.producer.publish(
-            b"body",
-            exchange_params=ExchangeParams("exchange_fanout",
-                                           exchange_type=ExchangeType.fanout))
+        self.producer.publish(b"body", exchange_params=self.EX_FANOUT)
 
-        event.wait(timeout=1.0)
+        self.assertTrue(msg_event.wait(timeout=1.0),
+                        "timed out waiting for message")
         self.assertEqual(msg_received, b"body")
 
     def test_consume_from_exchange_routing_key_and_queue(self):
@@ -196,18 +207,22 @@ class IntegrationTest(unittest.TestCase):
         specific queue.
         """
         msg_received = None
-        event = threading.Event()
+        consume_ok = threading.Event()
+        msg_event = threading.Event()
 
         def on_msg(msg):
-            event.set()
-
             nonlocal msg_received
-            msg_received = msg
+
+            if isinstance(msg, ConsumeOK):
+                consume_ok.set()
+            else:
+                msg_received = msg
+                msg_event.set()
 
         # Consume
         consume_key = self.consumer.consume(
             ConsumeParams(on_msg),
-            exchange_params=ExchangeParams("exchange_direct"),
+            exchange_params=self.EX_DIRECT,
             routing_key="fish",
             queue_params=QueueParams("queue_direct_receiver")
         )
@@ -215,18 +230,18 @@ class IntegrationTest(unittest.TestCase):
                          "queue_direct_receiver|exchange_direct|fish")
 
         # Wait for ConsumeOK
-        event.wait(timeout=1.0)
-        self.assertTrue(isinstance(msg_received, ConsumeOK))
+        self.assertTrue(consume_ok.wait(timeout=1.0),
+                        "timed out waiting for ConsumeOK")
 
         # Send a message and verify it is delivered OK
-        event.clear()
         self.producer.publish(
             b"body",
-            exchange_params=ExchangeParams("exchange_direct"),
+            exchange_params=self.EX_DIRECT,
             routing_key="fish"
         )
 
-        event.wait(timeout=1.0)
+        self.assertTrue(msg_event.wait(timeout=1.0),
+                        "timed out waiting for message")
         self.assertEqual(msg_received, b"body")
 
     def test_confirm_mode(self):
@@ -235,31 +250,42 @@ class IntegrationTest(unittest.TestCase):
         delivery.
         """
         msg_received = None
-        event = threading.Event()
+        confirm_mode_ok = threading.Event()
+        confirm_event = threading.Event()
 
         def on_confirm(confirm):
-            event.set()
-
             nonlocal msg_received
-            msg_received = confirm
+
+            if isinstance(confirm, ConfirmModeOK):
+                confirm_mode_ok.set()
+            else:
+                msg_received = confirm
+                confirm_event.set()
+
+        # Confirm mode cannot be turned off, use a separate producer.
+        producer = RMQProducer()
+        producer.start()
+        self.assertTrue(started(producer))
 
         # Activate confirm mode
-        self.producer.activate_confirm_mode(on_confirm)
+        producer.activate_confirm_mode(on_confirm)
 
         # Wait for ConfirmModeOK
-        event.wait(timeout=1.0)
-        self.assertTrue(isinstance(msg_received, ConfirmModeOK))
+        self.assertTrue(confirm_mode_ok.wait(timeout=1.0),
+                        "timed out waiting for ConfirmModeOK")
 
         # Send a message and verify it is delivered OK
-        event.clear()
-        publish_key = self.producer.publish(
+        publish_key = producer.publish(
             b"body",
-            exchange_params=ExchangeParams("exchange_direct"),
+            exchange_params=self.EX_DIRECT,
         )
 
-        event.wait(timeout=1.0)
+        self.assertTrue(confirm_event.wait(timeout=1.0),
+                        "timed out waiting for confirm")
         self.assertEqual(msg_received, publish_key)
-        self.assertEqual(len(self.producer._unacked_publishes.keys()), 0)
+        self.assertEqual(len(producer._unacked_publishes.keys()), 0)
+
+        producer.stop()
 
     def test_buffer_publishes_with_confirm_mode_on(self):
         """
@@ -268,6 +294,20 @@ class IntegrationTest(unittest.TestCase):
         successfully, measured by counting and verifying the Basic.Acks
         received from the broker.
         """
+        self._buffer_publishes_with_confirm_mode_on(3)
+
+    def test_buffer_many_publishes_with_confirm_mode_on(self):
+        """
+        Same as test_buffer_publishes_with_confirm_mode_on, but with enough
+        publishes for the broker to confirm several at a time.
+        """
+        self._buffer_publishes_with_confirm_mode_on(1024, timeout=5.0)
+
+    def _buffer_publishes_with_confirm_mode_on(self, count, timeout=1.0):
+        """
+        :param count: int
+        :param timeout: float
+        """
         producer = RMQProducer()
         event = threading.Event()
         key_dict = dict()
@@ -282,28 +322,21 @@ class IntegrationTest(unittest.TestCase):
         # Activate confirm mode
         producer.activate_confirm_mode(on_confirm)
 
-        # Buffer a few publishes
-        key_dict[
-            producer.publish(
-                b"body", exchange_params=ExchangeParams("exchange_direct"))
-        ] = False
-        key_dict[
-            producer.publish(
-                b"body", exchange_params=ExchangeParams("exchange_direct"))
-        ] = False
-        key_dict[
-            producer.publish(
-                b"body", exchange_params=ExchangeParams("exchange_direct"))
-        ] = False
+        # Buffer the publishes
+        for _ in range(count):
+            key_dict[
+                producer.publish(b"body", exchange_params=self.EX_DIRECT)
+            ] = False
         self.assertEqual(len(producer._unacked_publishes.keys()), 0)
-        self.assertEqual(len(producer._buffered_messages), 3)
+        self.assertEqual(len(producer._buffered_messages), count)
 
         # Start the producer
         producer.start()
         self.assertTrue(started(producer))
 
         # Await all confirms
-        event.wait(timeout=1.0)
+        self.assertTrue(event.wait(timeout=timeout),
+                        "timed out waiting for confirms")
         self.assertEqual(len(producer._unacked_publishes.keys()), 0)
 
         # Stop the extra producer
@@ -319,11 +352,12 @@ class IntegrationTest(unittest.TestCase):
         This teardown enabled re-testability without getting messages sent by
         a previous run.
         """
-        client = RMQConsumer()
-        client.start()
-        assert started(client)
+        def purge():
+            cls.consumer._channel.queue_purge("queue_fanout_receiver")
+            cls.consumer._channel.queue_purge("queue")
 
-        client._channel.queue_purge("queue_fanout_receiver")
-        client._channel.queue_purge("queue")
+        # Runs on the consumer's connection thread before stop closes it.
+        cls.consumer.add_callback_threadsafe(purge)
 
-        client.stop()
+        cls.consumer.stop()
+        cls.producer.stop()
@@ -1,6 +1,8 @@
 import unittest
 
-from unittest.mock import Mock, patch, ANY
+from collections import deque
+
+from unittest.mock import Mock, patch, ANY, call
 
 from pika.spec import Basic
 
@@ -13,6 +15,7 @@ from rabbitmq_client import (
     DeliveryError,
     DEFAULT_EXCHANGE
 )
+from tests.defs import NotAnIOLoop
 
 
 # noinspection DuplicatedCode
@@ -27,6 +30,8 @@ class TestProducer(unittest.TestCase):
         """Setup to run before each test case."""
         self.producer = RMQProducer()
         self.producer.start()
+        # Make work handed to the ioloop run immediately.
+        self.producer._connection = Mock(ioloop=NotAnIOLoop())
         self.producer.on_ready()  # Fake connection getting ready
 
         self.producer.declare_queue = Mock()
@@ -37,8 +42,10 @@ class TestProducer(unittest.TestCase):
     def test_producer_readiness(self):
         """Verify the producer ready property changes appropriately."""
         self.assertTrue(self.producer.ready)
+        self.assertTrue(self.producer.ready_event.is_set())
         self.producer.on_close()
         self.assertFalse(self.producer.ready)
+        self.assertFalse(self.producer.ready_event.is_set())
         self.producer.on_ready()
         self.assertTrue(self.producer.ready)
         self.producer.on_close(permanent=True)
@@ -60,11 +67,7 @@ class TestProducer(unittest.TestCase):
             exchange_params, callback=ANY
         )
 
-        self.producer.on_exchange_declared(b"body",
-                                           exchange_params,
-                                           None,
-                                           routing_key="",
-                                           publish_params=None)
+        self.producer.on_exchange_declared(exchange_params, None)
         self.producer.basic_publish.assert_called_with(
             b"body",
             exchange=exchange_params.exchange,
@@ -85,9 +88,7 @@ class TestProducer(unittest.TestCase):
             queue_params, callback=ANY
         )
 
-        self.producer.on_queue_declared(b"body",
-                                        frame_mock,
-                                        publish_params=None)
+        self.producer.on_queue_declared(queue_params, frame_mock)
         self.producer.basic_publish.assert_called_with(
             b"body",
             exchange=DEFAULT_EXCHANGE,
@@ -136,11 +137,7 @@ class TestProducer(unittest.TestCase):
             exchange_params, callback=ANY
         )
 
-        self.producer.on_exchange_declared(b"body",
-                                           exchange_params,
-                                           None,
-                                           routing_key=routing_key,
-                                           publish_params=None)
+        self.producer.on_exchange_declared(exchange_params, None)
         self.producer.basic_publish.assert_called_with(
             b"body",
             exchange=exchange_params.exchange,
@@ -166,15 +163,11 @@ class TestProducer(unittest.TestCase):
             exchange_params, callback=ANY
         )
 
-        self.producer.on_exchange_declared(b"body",
-                                           exchange_params,
-                                           None,
-                                           routing_key="",
-                                           publish_params=publish_params)
+        self.producer.on_exchange_declared(exchange_params, None)
         self.producer.basic_publish.assert_called_with(
             b"body",
             exchange=exchange_params.exchange,
-            routing_key="",
+            routing_key=routing_key,
             publish_params=publish_params
         )
 
@@ -205,6 +198,345 @@ class TestProducer(unittest.TestCase):
             queue_params, callback=ANY
         )
 
+    def test_publish_buffered_if_closed_before_handed_over(self):
+        """
+        Verify that a publish handed over to the ioloop is buffered, rather
+        than sent, if the connection closes before the ioloop runs it.
+        """
+        # Prep
+        exchange_params = ExchangeParams("exchange")
+        self.producer._connection = Mock()
+
+        # Run test
+        self.producer.publish(b"body", exchange_params=exchange_params)
+        callback = (self.producer._connection.ioloop.add_callback_threadsafe
+                    .call_args[0][0])
+        self.producer.on_close()
+        callback()
+
+        # Assertions
+        self.producer.declare_exchange.assert_not_called()
+        self.assertEqual(1, len(self.producer._buffered_messages))
+
+        self.producer.on_ready()
+        self.producer.declare_exchange.assert_called_with(
+            exchange_params, callback=ANY
+        )
+
+    def test_publish_buffered_just_as_producer_gets_ready_is_sent(self):
+        """
+        Verify that a publish buffered just after the producer became ready,
+        and emptied its buffer, is still sent.
+        """
+        # Prep
+        exchange_params = ExchangeParams("exchange")
+        producer = self.producer
+
+        class ReadyOnAppend(deque):
+            def append(self, publish):
+                producer.on_ready()
+                super().append(publish)
+
+        self.producer.on_close()
+        self.producer._buffered_messages = ReadyOnAppend()
+
+        # Run test
+        self.producer.publish(b"body", exchange_params=exchange_params)
+
+        # Assertions
+        self.assertEqual(0, len(self.producer._buffered_messages))
+        self.producer.declare_exchange.assert_called_with(
+            exchange_params, callback=ANY
+        )
+
+    def test_buffered_publishes_declare_each_target_once(self):
+        """
+        Verify that buffered publishes sharing a publish target only lead to
+        a single declaration of that target once the producer becomes ready.
+        """
+        # Prep
+        exchange_params = ExchangeParams("exchange")
+        queue_params = QueueParams("queue")
+        frame_mock = Mock()
+        frame_mock.method.queue = "queue"
+
+        # Run test + assertions
+        self.producer.on_close()
+        self.producer.publish(b"body1", exchange_params=exchange_params)
+        self.producer.publish(b"body2", queue_params=queue_params)
+        self.producer.publish(b"body3", exchange_params=exchange_params)
+
+        self.producer.on_ready()
+        self.producer.declare_exchange.assert_called_once_with(
+            exchange_params, callback=ANY
+        )
+        self.producer.declare_queue.assert_called_once_with(
+            queue_params, callback=ANY
+        )
+        self.assertEqual(0, len(self.producer._buffered_messages))
+
+        self.producer.on_exchange_declared(exchange_params, None)
+        self.producer.on_queue_declared(queue_params, frame_mock)
+        self.producer.basic_publish.assert_has_calls([
+            call(b"body1", exchange=exchange_params.exchange, routing_key="",
+                 publish_params=None),
+            call(b"body2", exchange=DEFAULT_EXCHANGE,
+                 routing_key=queue_params.queue, publish_params=None),
+            call(b"body3", exchange=exchange_params.exchange, routing_key="",
+                 publish_params=None)
+        ])
+
+    def test_buffered_publishes_keep_buffer_order(self):
+        """
+        Verify that buffered publishes are handed on in the order they were
+        buffered, with only consecutive publishes sharing a target batched.
+        """
+        # Prep
+        exchange_params_1 = ExchangeParams("exchange1", auto_delete=True)
+        exchange_params_2 = ExchangeParams("exchange2", auto_delete=True)
+        self.producer.on_close()
+        self.producer.publish(b"body1", exchange_params=exchange_params_1)
+        self.producer.publish(b"body2", exchange_params=exchange_params_1)
+        self.producer.publish(b"body3", exchange_params=exchange_params_2)
+        self.producer.publish(b"body4", exchange_params=exchange_params_1)
+
+        # Run test
+        self.producer.on_ready()
+
+        # Assertions
+        self.assertEqual(
+            [exchange_params_1, exchange_params_2, exchange_params_1],
+            [declare[0][0]
+             for declare in self.producer.declare_exchange.call_args_list]
+        )
+        for declare in self.producer.declare_exchange.call_args_list:
+            declare[1]["callback"](None)
+        self.assertEqual(
+            [b"body1", b"body2", b"body3", b"body4"],
+            [publish[0][0]
+             for publish in self.producer.basic_publish.call_args_list]
+        )
+
+    def test_exchange_declared_once_per_channel(self):
+        """
+        Verify that an exchange is only declared once per channel, and that
+        publishes issued while the declaration is in flight wait for it.
+        """
+        # Prep
+        exchange_params = ExchangeParams("exchange")
+
+        # Run test + assertions
+        self.producer.publish(b"body1", exchange_params=exchange_params)
+        self.producer.publish(b"body2", exchange_params=exchange_params)
+        self.producer.declare_exchange.assert_called_once_with(
+            exchange_params, callback=ANY
+        )
+        self.producer.basic_publish.assert_not_called()
+
+        self.producer.on_exchange_declared(exchange_params, None)
+        self.assertEqual(2, self.producer.basic_publish.call_count)
+
+        self.producer.publish(b"body3", exchange_params=exchange_params)
+        self.producer.declare_exchange.assert_called_once()
+        self.producer.basic_publish.assert_called_with(
+            b"body3",
+            exchange=exchange_params.exchange,
+            routing_key="",
+            publish_params=None
+        )
+
+        # New channel, new declaration
+        self.producer.on_close()
+        self.producer.on_ready()
+        self.producer.publish(b"body4", exchange_params=exchange_params)
+        self.assertEqual(2, self.producer.declare_exchange.call_count)
+
+    def test_queue_declared_once_per_channel(self):
+        """
+        Verify that a queue is only declared once per channel, and that
+        publishes issued while the declaration is in flight wait for it.
+        """
+        # Prep
+        queue_params = QueueParams("queue")
+        frame_mock = Mock()
+        frame_mock.method.queue = "queue"
+
+        # Run test + assertions
+        self.producer.publish(b"body1", queue_params=queue_params)
+        self.producer.publish(b"body2", queue_params=queue_params)
+        self.producer.declare_queue.assert_called_once_with(
+            queue_params, callback=ANY
+        )
+        self.producer.basic_publish.assert_not_called()
+
+        self.producer.on_queue_declared(queue_params, frame_mock)
+        self.assertEqual(2, self.producer.basic_publish.call_count)
+
+        self.producer.publish(b"body3", queue_params=queue_params)
+        self.producer.declare_queue.assert_called_once()
+        self.producer.basic_publish.assert_called_with(
+            b"body3",
+            exchange=DEFAULT_EXCHANGE,
+            routing_key=queue_params.queue,
+            publish_params=None
+        )
+
+    def test_on_close_buffers_publishes_waiting_for_declaration(self):
+        """
+        Verify that publishes waiting for their target to be declared when
+        the channel goes down are buffered, and sent on the next channel.
+        """
+        # Prep
+        exchange_params = ExchangeParams("exchange")
+        auto_delete_params = ExchangeParams("auto_delete", auto_delete=True)
+        queue_params = QueueParams("queue")
+        frame_mock = Mock()
+        frame_mock.method.queue = "queue"
+
+        self.producer.publish(b"body1", exchange_params=exchange_params)
+        self.producer.publish(b"body2", queue_params=queue_params)
+        self.producer.publish(b"body3", exchange_params=auto_delete_params)
+
+        # Run test
+        self.producer.on_close()
+
+        # Assertions
+        self.assertEqual([b"body1", b"body2", b"body3"],
+                         [publish.body
+                          for publish in self.producer._buffered_messages])
+
+        self.producer.on_ready()
+        self.assertEqual(0, len(self.producer._buffered_messages))
+        self.producer.on_exchange_declared(exchange_params, None)
+        self.producer.on_queue_declared(queue_params, frame_mock)
+        callback = self.producer.declare_exchange.call_args[1]["callback"]
+        callback(None)
+        self.assertEqual(3, self.producer.basic_publish.call_count)
+
+    def test_publish_order_kept_across_declarations(self):
+        """
+        Verify that a publish to a declared exchange does not overtake an
+        earlier publish waiting for its exchange to be declared.
+        """
+        # Prep
+        exchange_params_1 = ExchangeParams("exchange1")
+        exchange_params_2 = ExchangeParams("exchange2")
+        self.producer.publish(b"body1", exchange_params=exchange_params_2)
+        self.producer.on_exchange_declared(exchange_params_2, None)
+
+        # Run test
+        self.producer.publish(b"body2", exchange_params=exchange_params_1)
+        self.producer.publish(b"body3", exchange_params=exchange_params_2)
+
+        # Assertions
+        self.assertEqual(1, self.producer.basic_publish.call_count)
+
+        self.producer.on_exchange_declared(exchange_params_1, None)
+        self.producer.basic_publish.assert_has_calls([
+            call(b"body1", exchange="exchange2", routing_key="",
+                 publish_params=None),
+            call(b"body2", exchange="exchange1", routing_key="",
+                 publish_params=None),
+            call(b"body3", exchange="exchange2", routing_key="",
+                 publish_params=None)
+        ])
+
+    def test_server_named_queue_is_not_cached(self):
+        """
+        Verify that a server-named queue is declared for every publish, and
+        that publishes go to the queue named by the broker.
+        """
+        # Prep
+        queue_params = QueueParams("")
+        frame_mock_1 = Mock()
+        frame_mock_1.method.queue = "amq.gen-queue-1"
+        frame_mock_2 = Mock()
+        frame_mock_2.method.queue = "amq.gen-queue-2"
+
+        # Run test + assertions
+        self.producer.publish(b"body1", queue_params=queue_params)
+        self.producer.publish(b"body2", queue_params=queue_params)
+        self.assertEqual(2, self.producer.declare_queue.call_count)
+
+        callback_1, callback_2 = [
+            declare[1]["callback"]
+            for declare in self.producer.declare_queue.call_args_list
+        ]
+        callback_1(frame_mock_1)
+        callback_2(frame_mock_2)
+        self.producer.basic_publish.assert_has_calls([
+            call(b"body1", exchange=DEFAULT_EXCHANGE,
+                 routing_key="amq.gen-queue-1", publish_params=None),
+            call(b"body2", exchange=DEFAULT_EXCHANGE,
+                 routing_key="amq.gen-queue-2", publish_params=None)
+        ])
+        self.assertNotIn("", self.producer._declared_queues)
+
+        self.producer.publish(b"body3", queue_params=queue_params)
+        self.assertEqual(3, self.producer.declare_queue.call_count)
+
+    def test_auto_delete_exchange_is_not_cached(self):
+        """
+        Verify that an auto-delete exchange is declared for every publish.
+        """
+        # Prep
+        exchange_params = ExchangeParams("exchange", auto_delete=True)
+
+        # Run test + assertions
+        self.producer.publish(b"body1", exchange_params=exchange_params)
+        callback = self.producer.declare_exchange.call_args[1]["callback"]
+        callback(None)
+        self.producer.basic_publish.assert_called_once_with(
+            b"body1",
+            exchange=exchange_params.exchange,
+            routing_key="",
+            publish_params=None
+        )
+        self.assertNotIn("exchange", self.producer._declared_exchanges)
+
+        self.producer.publish(b"body2", exchange_params=exchange_params)
+        self.assertEqual(2, self.producer.declare_exchange.call_count)
+
+    def test_auto_delete_queue_is_not_cached(self):
+        """
+        Verify that an auto-delete queue is declared for every publish.
+        """
+        # Prep
+        queue_params = QueueParams("queue", auto_delete=True)
+        frame_mock = Mock()
+        frame_mock.method.queue = "queue"
+
+        # Run test + assertions
+        self.producer.publish(b"body1", queue_params=queue_params)
+        callback = self.producer.declare_queue.call_args[1]["callback"]
+        callback(frame_mock)
+        self.producer.basic_publish.assert_called_once()
+        self.assertNotIn("queue", self.producer._declared_queues)
+
+        self.producer.publish(b"body2", queue_params=queue_params)
+        self.assertEqual(2, self.producer.declare_queue.call_count)
+
+    def test_exclusive_queue_is_cached(self):
+        """
+        Verify that an exclusive queue, which lives as long as the connection,
+        is only declared once per channel.
+        """
+        # Prep
+        queue_params = QueueParams("queue", exclusive=True)
+        frame_mock = Mock()
+        frame_mock.method.queue = "queue"
+
+        # Run test + assertions
+        self.producer.publish(b"body1", queue_params=queue_params)
+        callback = self.producer.declare_queue.call_args[1]["callback"]
+        callback(frame_mock)
+        self.producer.basic_publish.assert_called_once()
+        self.assertIn("queue", self.producer._declared_queues)
+
+        self.producer.publish(b"body2", queue_params=queue_params)
+        self.producer.declare_queue.assert_called_once()
+        self.assertEqual(2, self.producer.basic_publish.call_count)
+
 
 class TestConfirmMode(unittest.TestCase):
     """
@@ -216,6 +548,8 @@ class TestConfirmMode(unittest.TestCase):
         """Setup to run before each test case."""
         self.producer = RMQProducer()
         self.producer.start()
+        # Make work handed to the ioloop run immediately.
+        self.producer._connection = Mock(ioloop=NotAnIOLoop())
         self.producer.on_ready()  # Fake connection getting ready
 
         self.producer.confirm_delivery = Mock()
@@ -281,9 +615,7 @@ class TestConfirmMode(unittest.TestCase):
         )
 
         self.producer.declare_exchange.assert_called()
-        self.producer.on_exchange_declared(
-            b"body", exchange_params, None, publish_key=publish_key
-        )
+        self.producer.on_exchange_declared(exchange_params, None)
         self.producer.basic_publish.assert_called_with(
             b"body", exchange=exchange_params.exchange, routing_key="",
             publish_params=ANY
@@ -298,6 +630,23 @@ class TestConfirmMode(unittest.TestCase):
         self.producer.on_delivery_confirmed(frame)
         self.assertEqual(len(self.producer._unacked_publishes.keys()), 0)
 
+    def test_confirm_mode_publish_keys_are_unique(self):
+        """
+        Verify that every publish in confirm mode is given its own key.
+        """
+        # Prep
+        self.producer.activate_confirm_mode(lambda _: ...)
+        exchange_params = ExchangeParams("exchange")
+
+        # Test
+        publish_keys = {
+            self.producer.publish(b"body", exchange_params=exchange_params)
+            for _ in range(10)
+        }
+
+        # Assert
+        self.assertEqual(len(publish_keys), 10)
+
     def test_on_ready_initiates_confirm_mode_again(self):
         """
         Verify that after connectivity issues, on_ready will re-start confirm-
@@ -341,6 +690,85 @@ class TestConfirmMode(unittest.TestCase):
         # Assert
         self.assertTrue(got_error)
 
+    def test_on_close_resets_unacked_publishes(self):
+        """
+        Verify that publishes awaiting confirmation are reported as failed
+        and forgotten when the channel goes down, since delivery tags restart
+        on the next channel.
+        """
+        # Prep
+        confirms = []
+        self.producer.activate_confirm_mode(confirms.append)
+        self.producer._unacked_publishes[1] = "123"
+        self.producer._unacked_publishes[2] = "456"
+        self.producer._next_delivery_tag = 3
+
+        # Test
+        self.producer.on_close()
+
+        # Assert
+        self.assertEqual(len(self.producer._unacked_publishes.keys()), 0)
+        self.assertEqual(self.producer._next_delivery_tag, 1)
+        self.assertEqual(["123", "456"],
+                         [confirm.publish_key for confirm in confirms])
+        for confirm in confirms:
+            self.assertIsInstance(confirm, DeliveryError)
+
+    def test_multiple_ack_confirms_all_publishes_up_to_delivery_tag(self):
+        """
+        Verify that an ack with the multiple flag set confirms every
+        outstanding publish up to and including its delivery tag.
+        """
+        # Prep
+        confirmed = list()
+        self.producer.activate_confirm_mode(confirmed.append)
+        self.producer._unacked_publishes.update({1: "1", 2: "2", 3: "3"})
+
+        # Test
+        frame = Mock()
+        frame.method = Basic.Ack(delivery_tag=2, multiple=True)
+        self.producer.on_delivery_confirmed(frame)
+
+        # Assert
+        self.assertEqual(confirmed, ["1", "2"])
+        self.assertEqual(list(self.producer._unacked_publishes.keys()), [3])
+
+    def test_multiple_nack_leads_to_delivery_errors(self):
+        """
+        Verify that a nack with the multiple flag set results in a delivery
+        error for every outstanding publish up to its delivery tag.
+        """
+        # Prep
+        errors = list()
+        self.producer.activate_confirm_mode(errors.append)
+        self.producer._unacked_publishes.update({1: "1", 2: "2"})
+
+        # Test
+        frame = Mock()
+        frame.method = Basic.Nack(delivery_tag=2, multiple=True)
+        self.producer.on_delivery_confirmed(frame)
+
+        # Assert
+        self.assertEqual([error.publish_key for error in errors], ["1", "2"])
+        self.assertEqual(len(self.producer._unacked_publishes.keys()), 0)
+
+    def test_confirm_for_unknown_delivery_tag_is_ignored(self):
+        """
+        Verify that a confirm for a delivery tag that is not awaiting
+        confirmation does not crash, nor reach the delivery notify callback.
+        """
+        # Prep
+        confirmed = list()
+        self.producer.activate_confirm_mode(confirmed.append)
+
+        # Test
+        frame = Mock()
+        frame.method = Basic.Ack(delivery_tag=1)
+        self.producer.on_delivery_confirmed(frame)
+
+        # Assert
+        self.assertEqual(confirmed, [])
+
     def test_activate_confirm_mode_idempotent(self):
         """
         Verify that calling activate_confirm_mode more than once has no effect,
@@ -354,6 +782,24 @@ class TestConfirmMode(unittest.TestCase):
         self.producer.activate_confirm_mode(on_confirm)
         self.producer.confirm_delivery.assert_called_once()
 
+    def test_confirm_mode_not_activated_if_closed_before_handed_over(self):
+        """
+        Verify that confirm mode activation handed over to the ioloop is left
+        to the next 'on_ready' if the connection closes before it runs.
+        """
+        # Prep
+        self.producer._connection = Mock()
+
+        # Test
+        self.producer.activate_confirm_mode(lambda _: ...)
+        callback = (self.producer._connection.ioloop.add_callback_threadsafe
+                    .call_args[0][0])
+        self.producer.on_close()
+        callback()
+
+        # Assert
+        self.producer.confirm_delivery.assert_not_called()
+
     def test_confirm_mode_delays_buffer_until_confirm_mode_ok(self):
         """
         Verify that, if confirm mode has been activated, buffered publishes